@@ -6,13 +6,29 @@ Examines a PDF to understand its structure and find potential section breaks.
 
 import sys
 import os
+import re
 from PyPDF2 import PdfReader
 
+# TOC-like lines end in "..." or in a 1-3 digit page number after a dot,
+# e.g. "Shooting settings....... 42" or "4.2 Exposure. 117". Matches whole
+# lines of a page's text; group 1 is the line without surrounding whitespace.
+_TOC_RE = re.compile(r'^[^\S\n]*((?=\S)[^\n]*?(?:\.\.\.|\.[^\S\n]*[1-9]\d{0,2}))[^\S\n]*$',
+                     re.MULTILINE)
+
+# Stop sampling pages for TOC entries once this many have been found
+MAX_TOC_ENTRIES = 50
+
+def get_page_text(pages, page_num, text_cache):
+    """Extract a page's text once, reusing it for later samples of the same page."""
+    if page_num not in text_cache:
+        text_cache[page_num] = pages[page_num].extract_text()
+    return text_cache[page_num]
+
 def examine_pdf(input_path):
     """Examine PDF structure and content."""
     
     try:
-        reader = PdfReader(input_path)
+        reader = PdfReader(input_path, strict=False)
         total_pages = len(reader.pages)
         print(f"PDF has {total_pages} pages")
         
@@ -32,25 +48,25 @@ def examine_pdf(input_path):
             for key, value in reader.metadata.items():
                 print(f"  {key}: {value}")
         
+        # Resolve the page list once and share it (and extracted text) between
+        # the TOC and structure sampling below
+        pages = reader.pages
+        text_cache = {}
+        
         # Sample first few pages to look for TOC
         print(f"\nSampling first 20 pages for table of contents patterns:")
         toc_patterns = []
         
         for page_num in range(min(20, total_pages)):
+            if len(toc_patterns) >= MAX_TOC_ENTRIES:
+                print(f"Stopped sampling after page {page_num}: found {len(toc_patterns)} entries")
+                break
             try:
-                page = reader.pages[page_num]
-                text = page.extract_text()
+                text = get_page_text(pages, page_num, text_cache)
                 
-                # Look for common TOC patterns
-                lines = text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    # Look for lines with page numbers at the end
-                    if line and (line.endswith('...') or 
-                               any(line.endswith(f'...{i}') for i in range(1, 1000)) or
-                               any(line.endswith(f'{i}') and line[:-len(str(i))].strip().endswith('.') 
-                                   for i in range(1, 1000))):
-                        toc_patterns.append((page_num + 1, line))
+                # Look for lines with page numbers at the end
+                for match in _TOC_RE.finditer(text):
+                    toc_patterns.append((page_num + 1, match.group(1)))
                         
             except Exception as e:
                 print(f"Error reading page {page_num + 1}: {e}")
@@ -71,8 +87,7 @@ def examine_pdf(input_path):
         for page_num in sample_pages:
             if page_num < total_pages:
                 try:
-                    page = reader.pages[page_num]
-                    text = page.extract_text()
+                    text = get_page_text(pages, page_num, text_cache)
                     lines = text.split('\n')[:10]  # First 10 lines
                     print(f"\nPage {page_num + 1} sample:")
                     for line in lines:
@@ -5,10 +5,15 @@ Split large PDF sections into smaller chunks for better readability
 
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from PyPDF2 import PdfReader, PdfWriter
 import argparse
 
+# PyPDF2 issues many small writes while serializing a PDF; a large buffer
+# turns them into a few big writes per chunk file
+WRITE_BUFFER_SIZE = 1024 * 1024
+
 def get_file_size_mb(file_path):
     """Get file size in MB"""
     return os.path.getsize(file_path) / (1024 * 1024)
@@ -36,15 +41,12 @@ def split_pdf_by_pages(input_path, output_dir, pages_per_chunk=25):
             chunk_filename = f"{base_name}_part{chunk_number:02d}_pages{start_page+1}-{end_page}.pdf"
             chunk_path = output_dir / chunk_filename
             
-            # Create writer for this chunk
+            # Create writer for this chunk and copy its page range in one call
             writer = PdfWriter()
-            
-            # Add pages to this chunk
-            for page_idx in range(start_page, end_page):
-                writer.add_page(reader.pages[page_idx])
+            writer.append(reader, pages=(start_page, end_page), import_outline=False)
             
             # Write the chunk
-            with open(chunk_path, 'wb') as output_file:
+            with open(chunk_path, 'wb', buffering=WRITE_BUFFER_SIZE) as output_file:
                 writer.write(output_file)
             
             chunk_size_mb = get_file_size_mb(chunk_path)
@@ -67,12 +69,16 @@ def process_large_pdfs(input_dir, size_threshold_mb=0.5, pages_per_chunk=25):
         print(f"Directory {input_dir} does not exist")
         return
     
-    # Find large PDFs
+    # Find large PDFs (scandir entries carry their stat, so one call per file)
     large_pdfs = []
-    for pdf_file in input_path.glob("*.pdf"):
-        size_mb = get_file_size_mb(pdf_file)
-        if size_mb > size_threshold_mb:
-            large_pdfs.append((pdf_file, size_mb))
+    with os.scandir(input_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".pdf") or not entry.is_file():
+                continue
+            size_mb = entry.stat().st_size / (1024 * 1024)
+            if size_mb > size_threshold_mb:
+                large_pdfs.append((Path(entry.path), size_mb))
+    large_pdfs.sort()
     
     if not large_pdfs:
         print(f"No PDFs larger than {size_threshold_mb} MB found")
@@ -84,24 +90,31 @@ def process_large_pdfs(input_dir, size_threshold_mb=0.5, pages_per_chunk=25):
     
     print(f"\\nSplitting large PDFs into chunks of {pages_per_chunk} pages...")
     
-    # Process each large PDF
+    # Split the large PDFs in parallel; each one is independent and CPU-bound
     total_created = 0
-    for pdf_file, size_mb in large_pdfs:
-        print(f"\\nProcessing {pdf_file.name} ({size_mb:.1f} MB)...")
-        
-        chunks = split_pdf_by_pages(pdf_file, input_path, pages_per_chunk)
+    max_workers = min(len(large_pdfs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for pdf_file, size_mb in large_pdfs:
+            print(f"\\nProcessing {pdf_file.name} ({size_mb:.1f} MB)...")
+            future = executor.submit(split_pdf_by_pages, pdf_file, input_path, pages_per_chunk)
+            futures[future] = pdf_file
         
-        if chunks:
-            print(f"  Successfully split into {len(chunks)} chunks")
-            total_created += len(chunks)
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            chunks = future.result()
             
-            # Move original file to backup
-            backup_name = pdf_file.stem + "_ORIGINAL.pdf"
-            backup_path = input_path / backup_name
-            pdf_file.rename(backup_path)
-            print(f"  Original moved to {backup_name}")
-        else:
-            print(f"  Failed to split {pdf_file.name}")
+            if chunks:
+                print(f"  {pdf_file.name}: successfully split into {len(chunks)} chunks")
+                total_created += len(chunks)
+                
+                # Move original file to backup
+                backup_name = pdf_file.stem + "_ORIGINAL.pdf"
+                backup_path = input_path / backup_name
+                pdf_file.rename(backup_path)
+                print(f"  Original moved to {backup_name}")
+            else:
+                print(f"  Failed to split {pdf_file.name}")
     
     print(f"\\nSummary: Created {total_created} smaller PDF chunks")
 
@@ -10,60 +10,81 @@ import re
 from pathlib import Path
 from PyPDF2 import PdfReader, PdfWriter
 
+# PyPDF2 issues many small writes while serializing a PDF; a large buffer
+# turns them into a few big writes per section file
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+_INVALID_FILENAME_CHARS_RE = re.compile(r'[^\w\s-]')
+_FILENAME_SEPARATORS_RE = re.compile(r'[-\s]+')
+
 def sanitize_filename(title):
     """Convert bookmark title to a safe filename."""
     # Remove or replace invalid filename characters
-    title = re.sub(r'[^\w\s-]', '', title)
-    title = re.sub(r'[-\s]+', '_', title)
+    title = _INVALID_FILENAME_CHARS_RE.sub('', title)
+    title = _FILENAME_SEPARATORS_RE.sub('_', title)
     return title.strip('_').lower()
 
-def get_page_number(reader, destination):
+def build_page_index(reader):
+    """Map each page's indirect object number to its page index."""
+    return {
+        page.indirect_reference.idnum: i
+        for i, page in enumerate(reader.pages)
+        if page.indirect_reference is not None
+    }
+
+def get_page_number(reader, destination, page_index=None):
     """Extract page number from a bookmark destination."""
     try:
         if hasattr(destination, 'page'):
             # Get the page object
             page_ref = destination.page
-            
-            # Handle indirect object reference
-            if hasattr(page_ref, 'get_object'):
-                page_obj = page_ref.get_object()
-            else:
-                page_obj = page_ref
-            
-            # Find page index
-            for i, page in enumerate(reader.pages):
-                if page == page_obj:
-                    return i
-                    
         elif isinstance(destination, list) and len(destination) > 0:
             # Indirect page reference
-            page_obj = destination[0]
-            if hasattr(page_obj, 'get_object'):
-                page_obj = page_obj.get_object()
-            
-            for i, page in enumerate(reader.pages):
-                if page == page_obj:
-                    return i
+            page_ref = destination[0]
+        else:
+            return None
+        
+        # Look the page up by its indirect reference when we have an index
+        idnum = getattr(page_ref, 'idnum', None)
+        if page_index is not None and idnum in page_index:
+            return page_index[idnum]
+        
+        # Handle indirect object reference
+        if hasattr(page_ref, 'get_object'):
+            page_obj = page_ref.get_object()
+        else:
+            page_obj = page_ref
+        
+        # Find page index
+        for i, page in enumerate(reader.pages):
+            if page == page_obj:
+                return i
     except Exception as e:
         print(f"Error getting page number: {e}")
     return None
 
-def extract_bookmarks(reader, bookmarks=None, level=0):
-    """Recursively extract bookmarks and their page numbers."""
-    if bookmarks is None:
-        bookmarks = reader.outline
+def extract_bookmarks(reader, page_index=None):
+    """Extract bookmarks and their page numbers, in outline order."""
+    if page_index is None:
+        page_index = build_page_index(reader)
     
     sections = []
     
-    for item in bookmarks:
-        if isinstance(item, list):
-            # Nested bookmarks
-            sections.extend(extract_bookmarks(reader, item, level + 1))
-        else:
+    # Walk the outline depth-first with an explicit stack of (iterator, level)
+    # so nested lists resume where they left off and order is preserved
+    stack = [(iter(reader.outline), 0)]
+    while stack:
+        items, level = stack[-1]
+        for item in items:
+            if isinstance(item, list):
+                # Nested bookmarks
+                stack.append((iter(item), level + 1))
+                break
+            
             # Individual bookmark
             try:
                 title = item.title
-                page_num = get_page_number(reader, item)
+                page_num = get_page_number(reader, item, page_index)
                 
                 if page_num is not None:
                     sections.append({
@@ -76,6 +97,8 @@ def extract_bookmarks(reader, bookmarks=None, level=0):
                 # Handle different bookmark object types
                 print(f"Skipping bookmark item: {type(item)}")
                 continue
+        else:
+            stack.pop()
     
     return sections
 
@@ -124,12 +147,11 @@ def split_pdf_by_toc(input_path, output_dir, max_level=2):
             try:
                 writer = PdfWriter()
                 
-                # Add pages
-                for page_num in range(start_page, end_page):
-                    writer.add_page(reader.pages[page_num])
+                # Add the section's pages in one call
+                writer.append(reader, pages=(start_page, end_page), import_outline=False)
                 
                 # Write file
-                with open(output_filename, 'wb') as output_file:
+                with open(output_filename, 'wb', buffering=WRITE_BUFFER_SIZE) as output_file:
                     writer.write(output_file)
                 
                 pages_count = end_page - start_page
@@ -1,7 +1,8 @@
 # save as r50_interval.py
 # Requires: pip install requests
-import requests, time, sys, logging, argparse
+import requests, time, sys, os, json, logging, argparse
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -11,11 +12,29 @@ logger = logging.getLogger(__name__)
 CAMERA_IP = "192.168.12.98"   # <- put your camera IP (or discovered IP)
 PORT = 443                 # try 8080 first; Canon menu can change port
 BASE = f"https://{CAMERA_IP}:{PORT}"
+ENDPOINT_CACHE = os.path.expanduser("~/.cache/r50_interval.json")
+
+# Reuse one keep-alive connection to the camera instead of paying a TLS
+# handshake on every request
+SESSION = requests.Session()
+SESSION.verify = False  # camera uses a self-signed certificate
+SESSION.headers.update({'Connection': 'keep-alive'})
+SESSION.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=4))
+
+# Precomputed seconds for the standard Canon TV (shutter speed) values so the
+# common case is a dict lookup rather than a string parse
+_TV_TABLE = {
+    **{f"1/{d}": 1.0 / d for d in (8000, 6400, 5000, 4000, 3200, 2500, 2000, 1600,
+                                   1250, 1000, 800, 640, 500, 400, 320, 250, 200,
+                                   160, 125, 100, 80, 60, 50, 40, 30, 25, 20, 15,
+                                   13, 10, 8, 6, 5, 4, 3)},
+    **{str(s): float(s) for s in (1, 2, 3, 4, 5, 6, 8, 10, 13, 15, 20, 25, 30)},
+}
 
 def discover_ccapi():
     url = f"{BASE}/ccapi/"
     logger.info(f'Connecting to camera API: {url}')
-    r = requests.get(url, verify=False)
+    r = SESSION.get(url)
     r.raise_for_status()
     idx = r.json()
     logger.debug(f"CCAPI root JSON keys: {list(idx.keys())}")
@@ -27,28 +46,29 @@ def discover_ccapi():
 
 def find_shooting_endpoints(idx):
     # Look for shutter button control endpoints
-    # Canon CCAPI provides multiple shutter control endpoints
-    endpoints = []
-    
-    # Search through all API versions for shutter endpoints
-    for version, endpoints_list in idx.items():
-        if isinstance(endpoints_list, list):
-            for endpoint in endpoints_list:
-                if isinstance(endpoint, dict) and 'path' in endpoint:
-                    path = endpoint['path']
-                    # Look for shutter button control endpoints
-                    if 'shutterbutton' in path and endpoint.get('post', False):
-                        endpoints.append(path)
-    
-    # Prefer manual shutter endpoint over regular one
+    # Canon CCAPI provides multiple shutter control endpoints; prefer the
+    # manual shutter endpoint over the regular one, stopping as soon as a
+    # manual endpoint is found
     manual_endpoint = None
     regular_endpoint = None
     
-    for endpoint in endpoints:
-        if 'manual' in endpoint:
-            manual_endpoint = endpoint
-        elif 'shutterbutton' in endpoint and not manual_endpoint:
-            regular_endpoint = endpoint
+    # Search through all API versions for shutter endpoints
+    for endpoints_list in idx.values():
+        if not isinstance(endpoints_list, list):
+            continue
+        for endpoint in endpoints_list:
+            if not isinstance(endpoint, dict):
+                continue
+            path = endpoint.get('path', '')
+            if 'shutterbutton' not in path or not endpoint.get('post', False):
+                continue
+            if 'manual' in path:
+                manual_endpoint = path
+                break
+            if regular_endpoint is None:
+                regular_endpoint = path
+        if manual_endpoint:
+            break
     
     # Return the best endpoint found
     if manual_endpoint:
@@ -60,11 +80,48 @@ def find_shooting_endpoints(idx):
     
     return None
 
+def load_cached_endpoint():
+    """Return the shutter endpoint saved by a previous run for this camera, if any"""
+    try:
+        with open(ENDPOINT_CACHE) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('camera_ip') != CAMERA_IP or not cached.get('path'):
+        return None
+    logger.info(f"Using cached shutter endpoint: {cached['path']}")
+    return cached['path']
+
+def save_cached_endpoint(path):
+    """Remember the discovered shutter endpoint so later runs can skip discovery"""
+    try:
+        os.makedirs(os.path.dirname(ENDPOINT_CACHE), exist_ok=True)
+        with open(ENDPOINT_CACHE, 'w') as f:
+            json.dump({'camera_ip': CAMERA_IP, 'path': path}, f)
+    except OSError as e:
+        logger.warning(f"Could not save endpoint cache {ENDPOINT_CACHE}: {e}")
+
+def clear_cached_endpoint():
+    """Forget the cached shutter endpoint"""
+    try:
+        os.remove(ENDPOINT_CACHE)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove endpoint cache {ENDPOINT_CACHE}: {e}")
+
+def discover_shutter_endpoint():
+    """Discover the shutter endpoint from the CCAPI index and cache it"""
+    path = find_shooting_endpoints(discover_ccapi())
+    if path:
+        save_cached_endpoint(path)
+    return path
+
 def post_shutter_action(path, action_payload):
     """Send a single shutter action to the camera"""
     url = f"{BASE}{path}"
     try:
-        r = requests.post(url, json=action_payload, timeout=5, verify=False)
+        r = SESSION.post(url, json=action_payload, timeout=5)
         logger.debug(f"POST {url} payload {action_payload} => {r.status_code}")
         try:
             response_data = r.json()
@@ -99,21 +156,26 @@ def release_shutter(path):
     logger.error("Could not release shutter - camera may need manual reset")
     return False
 
+# Press payload that last worked; starts without AF for manual night sky
+# photography and switches to AF=True once the camera is found to need it
+_PRESS_PAYLOAD = {"af": False, "action": "full_press"}
+
 def take_photo(path):
     """Take a single photo using proper press/release sequence"""
-    # For manual night sky photography - no autofocus
-    # Based on test results, we'll try without AF first
-    press_payload = {"af": False, "action": "full_press"}  # Manual focus mode
+    global _PRESS_PAYLOAD
+    press_payload = _PRESS_PAYLOAD
     release_payload = {"af": False, "action": "release"}   # Release
     
     logger.debug(f"Pressing shutter: {press_payload}")
     r_press = post_shutter_action(path, press_payload)
     
-    # If that fails, try with AF=True since that worked in tests
+    # If that fails, try the other AF setting and remember it if it works
     if not r_press or r_press.status_code not in (200, 201, 202):
-        logger.warning("Press failed, Retrying with AF=True payload...")
-        press_payload = {"af": True, "action": "full_press"}
+        press_payload = {"af": not press_payload["af"], "action": "full_press"}
+        logger.warning(f"Press failed, Retrying with AF={press_payload['af']} payload...")
         r_press = post_shutter_action(path, press_payload)
+        if r_press and r_press.status_code in (200, 201, 202):
+            _PRESS_PAYLOAD = press_payload
     
     if r_press and r_press.status_code in (200, 201, 202):
         # Wait a moment for the camera to process
@@ -145,7 +207,7 @@ def get_camera_settings():
     url = f"{BASE}/ccapi/v100/shooting/settings"
     try:
         logger.info(f"Getting camera settings: {url}")
-        r = requests.get(url, verify=False, timeout=5)
+        r = SESSION.get(url, timeout=5)
         logger.info(f"GET {url} => {r.status_code}")
         
         if r.status_code in (200, 201, 202):
@@ -185,6 +247,11 @@ def parse_shutter_speed(settings):
 def convert_tv_to_seconds(tv_value):
     """Convert Canon TV (shutter speed) values to seconds"""
     # Canon TV values are typically strings like "1/60", "1", "2", "1/250", etc.
+    if isinstance(tv_value, str):
+        seconds = _TV_TABLE.get(tv_value)
+        if seconds is not None:
+            return seconds
+
     try:
         if isinstance(tv_value, str):
             if '/' in tv_value:
@@ -279,11 +346,9 @@ if __name__ == "__main__":
         logger.info(f"Parameters: interval={args.interval}s, no stop time specified (will run indefinitely)")
     
     try:
-        # Connect to camera and discover endpoints
-        idx = discover_ccapi()
-        
         # Test camera settings if requested
         if args.test_settings:
+            discover_ccapi()
             logger.info("=== Testing camera settings API ===")
             settings = get_camera_settings()
             if settings:
@@ -297,8 +362,20 @@ if __name__ == "__main__":
             logger.info("Test complete - exiting")
             sys.exit(0)
         
-        # Find shutter control endpoint
-        path = find_shooting_endpoints(idx)
+        # Find shutter control endpoint, skipping discovery if a previous run cached it
+        path = load_cached_endpoint()
+        if path:
+            r = post_shutter_action(path, {"af": False, "action": "release"})
+            if r is None:
+                # Camera unreachable - fall through to discovery so we fail fast
+                logger.warning(f"Could not reach camera with cached endpoint {path} - rediscovering")
+                path = None
+            elif r.status_code in (400, 404):
+                logger.warning(f"Cached endpoint {path} rejected by camera ({r.status_code}) - rediscovering")
+                clear_cached_endpoint()
+                path = None
+        if not path:
+            path = discover_shutter_endpoint()
         if not path:
             logger.error("Couldn't auto-detect a shutter button endpoint. Available endpoints are listed above.")
             logger.error("Make sure the camera is in a shooting mode (not playback) and try again.")
@@ -326,16 +403,20 @@ if __name__ == "__main__":
         
         successful_shots = 0
         shot_number = 1
+        # Schedule shots against a monotonic deadline so the time spent taking
+        # each photo does not accumulate as drift in the interval
+        next_deadline = time.monotonic()
         
         while True:
             # Check if we should stop
-            if args.stop_at and datetime.now() >= args.stop_at:
+            now = datetime.now()
+            if args.stop_at and now >= args.stop_at:
                 logger.info(f"Stop time reached: {args.stop_at.strftime('%H:%M')}")
                 break
             
-            current_time = datetime.now().strftime('%H:%M:%S')
+            current_time = now.strftime('%H:%M:%S')
             if args.stop_at:
-                time_remaining = args.stop_at - datetime.now()
+                time_remaining = args.stop_at - now
                 time_remaining = str(time_remaining).split('.')[0]
                 logger.info(f"=== Shot {shot_number} at {current_time} (time remaining: {time_remaining}) ===")
             else:
@@ -351,13 +432,20 @@ if __name__ == "__main__":
             
             shot_number += 1
             
-            # Check if we should stop before waiting
-            if args.stop_at and datetime.now() >= args.stop_at:
+            # Check if we should stop before waiting (taking the photo takes a while)
+            now = datetime.now()
+            if args.stop_at and now >= args.stop_at:
                 logger.info(f"Stop time reached: {args.stop_at.strftime('%H:%M')}")
                 break
             
-            logger.debug(f"Waiting {args.interval} seconds until next shot...")
-            time.sleep(args.interval)
+            next_deadline += args.interval
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                logger.debug(f"Waiting {delay:.2f} seconds until next shot...")
+                time.sleep(delay)
+            else:
+                logger.warning(f"Shot took longer than the {args.interval}s interval ({-delay:.2f}s behind) - taking next shot immediately")
+                next_deadline = time.monotonic()
         
         total_shots = shot_number - 1
         logger.info(f"=== Completed: {successful_shots}/{total_shots} shots taken successfully ===")
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 import argparse
-import glob
+import bisect
 import json
 import os
+import shutil
 import subprocess
 import sys
 
@@ -23,6 +24,8 @@ def parse_args():
                         help='Number of frames to skip. Default is zero. Zero frames are skipped, so all frames are '
                              'used. If set to 1, everyother frame is used; if set to 2, every 3rd frame is used; etc.')
     parser.add_argument('--open', action='store_true', help='Try to open movie when finished')
+    parser.add_argument('--no-ffmpeg', action='store_true',
+                        help='Encode with OpenCV even if ffmpeg is installed (default: pipe frames to ffmpeg when available)')
 #    darkgroup = parser.add_argument_group('Using Darkframe to clean up dead / hot pixels')
 #    darkgroup.add_argument('--darkframe', help='specify a "dark frame" to subract from each frame to '
 #                                            'eliminate "hot pixels"')
@@ -31,6 +34,80 @@ def parse_args():
 
     return parser.parse_args()
 
+# ffmpeg H.264 encoders to try, fastest first; hardware encoders are only
+# listed where they can exist
+FFMPEG_ENCODERS = (
+    (['h264_videotoolbox'] if sys.platform == 'darwin' else []) +
+    (['h264_nvenc'] if shutil.which('nvidia-smi') else []) +
+    ['libx264']
+)
+
+FFMPEG_ENCODER_ARGS = {
+    'h264_videotoolbox': ['-b:v', '20M'],
+    'h264_nvenc': ['-b:v', '20M'],
+    'libx264': ['-preset', 'veryfast', '-crf', '18'],
+}
+
+def ffmpeg_command(output, encoder, fps, size):
+    """ffmpeg arguments for encoding raw BGR frames read from stdin"""
+    width, height = size
+    return ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+            '-c:v', encoder, *FFMPEG_ENCODER_ARGS[encoder], '-pix_fmt', 'yuv420p', output]
+
+def probe_ffmpeg_encoder(encoder, fps, size):
+    """Encode one blank frame at the real size to check the encoder accepts it"""
+    width, height = size
+    # '-f null' has to come right before the output name to override the muxer
+    command = ffmpeg_command('-', encoder, fps, size)
+    command[-1:-1] = ['-f', 'null']
+    try:
+        result = subprocess.run(command, input=bytes(width * height * 3),
+                                capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+def find_ffmpeg_encoder(fps, size):
+    """Return the best H.264 encoder that works for this frame size, or None"""
+    if not shutil.which('ffmpeg'):
+        return None
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    available = {line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1}
+    # Hardware encoders are often limited to ~4096px and yuv420p needs even
+    # dimensions, so being listed is not enough - try each one at this size
+    for encoder in FFMPEG_ENCODERS:
+        if encoder not in available:
+            continue
+        if probe_ffmpeg_encoder(encoder, fps, size):
+            return encoder
+        print(f'ffmpeg {encoder} encoder cannot encode {size[0]}x{size[1]} frames, trying next option')
+    return None
+
+class FfmpegWriter:
+    """Drop-in for cv2.VideoWriter that pipes raw BGR frames to an ffmpeg process"""
+
+    def __init__(self, output, encoder, fps, size):
+        self.proc = subprocess.Popen(ffmpeg_command(output, encoder, fps, size), stdin=subprocess.PIPE)
+
+    def write(self, img):
+        try:
+            # cv2.imread returns a contiguous BGR array; hand its buffer over without copying
+            self.proc.stdin.write(img.data)
+        except BrokenPipeError:
+            print(f'ERROR: ffmpeg exited early (status {self.proc.wait()})')
+            sys.exit(1)
+
+    def release(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            print(f'ERROR: ffmpeg failed with status {self.proc.returncode}')
+            sys.exit(1)
+
 print(sys.argv)
 
 config = parse_args()
@@ -141,39 +218,55 @@ IMAGE_DIR = config.source
 
 # Import heavy dependencies after argument parsing
 import cv2
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import time
+from datetime import timedelta
 # from pilapse.darkframe import apply_darkframe, get_contours
 
+# JPEG decoding releases the GIL, so a few threads can keep decoding the next
+# frames while the current one is encoded. Memory use is bounded by
+# PREFETCH_DEPTH decoded frames.
+DECODE_WORKERS = 4
+PREFETCH_DEPTH = 8
+
+def prefetch_images(paths):
+    """Yield (path, image) in order, decoding up to PREFETCH_DEPTH images ahead"""
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append((path, executor.submit(cv2.imread, path)))
+            if len(pending) >= PREFETCH_DEPTH:
+                ready_path, future = pending.popleft()
+                yield ready_path, future.result()
+        while pending:
+            ready_path, future = pending.popleft()
+            yield ready_path, future.result()
+
 # darkframe = None if config.darkframe is None else cv2.imread(config.darkframe)
 
 if not os.path.isdir(IMAGE_DIR):
     print(f'image dir does not exist or is not a directory.')
     sys.exit(1)
 
-filelist = glob.glob(os.path.join(IMAGE_DIR, f'*.{config.type}') )
-filelist.sort()
+# List matching images in one directory scan; like glob, skip hidden files
+# (e.g. macOS "._IMG_0001.JPG" resource forks)
+suffix = '.' + config.type.lower()
+with os.scandir(IMAGE_DIR) as entries:
+    filelist = sorted(entry.path for entry in entries
+                      if not entry.name.startswith('.')
+                      and entry.name.lower().endswith(suffix)
+                      and entry.is_file())
 
 # Filter filelist to only include images in the timelapse range (JSON mode)
 if config.first_image_filter is not None:
     print(f'Filtering {len(filelist)} files to range: {config.first_image_filter} to {config.last_image_filter}')
-    filtered_list = []
-    in_range = False
-    for file in filelist:
-        filename = os.path.basename(file)
-
-        # Start including files when we reach first image
-        if not in_range and filename == config.first_image_filter:
-            in_range = True
-
-        # Include file if we're in range
-        if in_range:
-            filtered_list.append(file)
-
-        # Stop after last image
-        if filename == config.last_image_filter:
-            break
-
-    filelist = filtered_list
+    # Every path is in IMAGE_DIR, so the sorted list is also sorted by filename
+    # and the range can be found by binary search
+    names = [os.path.basename(file) for file in filelist]
+    first = bisect.bisect_left(names, config.first_image_filter)
+    last = bisect.bisect_right(names, config.last_image_filter)
+    filelist = filelist[first:last]
     print(f'  Filtered to {len(filelist)} files')
 
     # Sanity check: compare filtered count to expected count from JSON
@@ -183,6 +276,10 @@ if config.first_image_filter is not None:
             print(f'WARNING: Filtered file count ({len(filelist)}) does not match expected count from JSON ({expected})')
             print(f'  This may indicate missing files or incorrect firstImageName/lastImageName in the report')
 
+# Apply --skip up front so skipped frames never enter the encode loop
+if config.skip:
+    filelist = filelist[::config.skip + 1]
+
 total = len(filelist)
 
 if len(filelist) < 1:
@@ -216,7 +313,16 @@ capSize = (width, height)
 # Use H.264 (avc1) for large images, mp4v for smaller ones
 use_h264 = width > 3000 or height > 3000
 
-if use_h264:
+# Prefer piping frames to ffmpeg (hardware H.264 where available) over
+# OpenCV's generic VideoWriter; fall back to OpenCV if no encoder handles
+# this frame size
+encoder = None if config.no_ffmpeg else find_ffmpeg_encoder(fps, capSize)
+
+if encoder:
+    print(f'Using ffmpeg {encoder} encoder (image size {width}x{height})')
+    video = FfmpegWriter(config.output, encoder, fps, capSize)
+    success = True
+elif use_h264:
     print(f'Using H.264 codec (image size {width}x{height} requires QuickTime-compatible codec)')
     fourcc = cv2.VideoWriter_fourcc(*'avc1')
     video = cv2.VideoWriter()
@@ -238,24 +344,18 @@ if not success:
     print('ERROR: Failed to create video writer')
     sys.exit(1)
 
-start = datetime.now()
+# Progress timing uses plain monotonic float seconds; a timedelta is only
+# built when a progress line is actually printed
+start = time.monotonic()
 count = 0
 
-skipped = 0
-loop_start = datetime.now()
+loop_start = start
 
-for file in filelist:
+for file, img in prefetch_images(filelist):
     filename = os.path.basename(file)
 
     count += 1
 
-    # Skip frames based on --skip parameter
-    if skipped < config.skip:
-        skipped += 1
-        continue
-    skipped = 0
-
-    img = cv2.imread(file)
     if img is None:
         print(f'Could not load {file}')
         continue
@@ -270,13 +370,12 @@ for file in filelist:
 #        img = apply_darkframe(img, dark_contours)
     video.write(img)
 
-    now = datetime.now()
-    elapsed = now - start
-    if elapsed.total_seconds() > 10:
+    now = time.monotonic()
+    if now - start > 10:
         start = now
         loop_elapsed = now - loop_start
-        fps = count/loop_elapsed.total_seconds()
-        x = (total / fps) - loop_elapsed.total_seconds()
+        fps = count/loop_elapsed
+        x = (total / fps) - loop_elapsed
         remaining = str(timedelta(seconds=x)).split('.')[0]
         print(f'{count:5}/{total:5} {count/total*100:2.0f}%: {file} {remaining}')
 
@@ -8,6 +8,8 @@ import logging
 import requests
 import urllib3
 from argparse import ArgumentParser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Disable SSL warnings since camera uses self-signed certificate
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -19,12 +21,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# One keep-alive connection to the camera for the whole run, so polling does
+# not repeat the TLS handshake. Only connection setup is retried; a long poll
+# that times out is handled by run_monitor.
+session = requests.Session()
+session.verify = False
+session.headers.update({'Connection': 'keep-alive'})
+session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1,
+                                      max_retries=Retry(total=3, read=False, backoff_factor=1)))
+
 def check_camera(camera_ip):
     """Check if camera is available on the network."""
     url = f"https://{camera_ip}/ccapi"
 
     try:
-        response = requests.get(url, verify=False, timeout=5)
+        response = session.get(url, timeout=5)
         if response.status_code == 200:
             logger.info(f"Camera is available at {camera_ip}")
             return True
@@ -62,7 +73,7 @@ def run_monitor(camera_ip):
                 # Poll for events with long timeout (~30 seconds)
                 # This blocks until an event occurs or timeout expires
                 event_number += 1
-                response = requests.get(polling_url, verify=False, timeout=35)
+                response = session.get(polling_url, timeout=35)
 
                 if response.status_code == 200:
                     events = response.json()